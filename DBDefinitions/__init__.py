@@ -7,10 +7,12 @@ from sqlalchemy.ext.asyncio import create_async_engine
 
 from .baseDBModel import BaseModel
 from .eventDBModel import EventModel
+from .eventExceptionDBModel import EventExceptionModel
 
-async def startEngine(connectionstring, makeDrop=False, makeUp=True):
-    """Provede nezbytne ukony a vrati asynchronni SessionMaker"""
-    asyncEngine = create_async_engine(connectionstring)
+async def startEngine(connectionstring, makeDrop=False, makeUp=True, **engineArgs):
+    """Provede nezbytne ukony a vrati asynchronni SessionMaker
+    engineArgs jsou predany do create_async_engine (viz ComposeEngineArgs)"""
+    asyncEngine = create_async_engine(connectionstring, **engineArgs)
 
     async with asyncEngine.begin() as conn:
         if makeDrop:
@@ -47,3 +49,26 @@ def ComposeConnectionString():
     connectionstring = f"{driver}://{user}:{password}@{hostWithPort}/{database}"
 
     return connectionstring
+
+
+
+def ComposeEngineArgs():
+    """Odvozuje parametry enginu (velikost poolu a timeouty) z promennych prostredi.
+    pool_timeout omezuje cekani na spojeni z poolu,
+    statement_timeout (ms) a command_timeout (s) ukonci prilis dlouhe dotazy primo v databazi.
+    """
+    poolSize = int(os.environ.get("DB_POOL_SIZE", "5"))
+    maxOverflow = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    poolTimeout = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+    statementTimeout = float(os.environ.get("DB_STATEMENT_TIMEOUT", "15"))
+
+    engineArgs = {
+        "pool_size": poolSize,
+        "max_overflow": maxOverflow,
+        "pool_timeout": poolTimeout,
+        "connect_args": {
+            "command_timeout": statementTimeout,
+            "server_settings": {"statement_timeout": f"{int(statementTimeout * 1000)}"}
+        }
+    }
+    return engineArgs
@@ -1,7 +1,7 @@
 import sqlalchemy
 import datetime
 from sqlalchemy.schema import Column
-from sqlalchemy import Uuid, String, DateTime, ForeignKey
+from sqlalchemy import Uuid, String, DateTime, ForeignKey, Index
 
 from .baseDBModel import BaseModel
 from .uuid import uuid
@@ -15,8 +15,70 @@ class EventModel(BaseModel):
     startdate = Column(DateTime, comment="when the event should start")
     enddate = Column(DateTime, comment="when the event should end")
 
+    rrule = Column(String, nullable=True, comment="recurrence rule (RFC 5545 RRULE, e.g. FREQ=WEEKLY;COUNT=13), startdate is the first occurrence")
+
     masterevent_id = Column(
         ForeignKey("events.id"), index=True, nullable=True,
         comment="event which owns this event")
 
     lastchange = Column(DateTime, default=datetime.datetime.now)
+
+    __table_args__ = (
+        Index("ix_events_masterevent_id_startdate", "masterevent_id", "startdate"),
+    )
+
+
+#
+# text index on EventModel.name (used by event_search)
+# every word of searched text is matched as prefix of a word in name, case and diacritics insensitive
+# postgres: trigram (pg_trgm) GIN index over unaccented lowercase name
+# sqlite: FTS5 table synchronized by triggers
+#   events has UUID primary key, so its implicit rowid could be renumbered by VACUUM,
+#   FTS rowids are taken from events_fts_ids (INTEGER PRIMARY KEY, stable) which maps them to events.id
+#
+
+from sqlalchemy import event, DDL
+
+EVENTS_FTS_TABLE = "events_fts"
+EVENTS_FTS_IDS_TABLE = "events_fts_ids"
+EVENTS_UNACCENT_FUNCTION = "events_unaccent"
+
+for statement in [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent is not IMMUTABLE (depends on search_path), immutable wrapper is needed for index expression
+    f"""CREATE OR REPLACE FUNCTION {EVENTS_UNACCENT_FUNCTION}(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, lower($1)) $$""",
+    f"CREATE INDEX IF NOT EXISTS ix_events_name_trgm ON events USING gin ({EVENTS_UNACCENT_FUNCTION}(name) gin_trgm_ops)",
+]:
+    event.listen(EventModel.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+def _ftsRowid(eventId):
+    return f"(SELECT rowid FROM {EVENTS_FTS_IDS_TABLE} WHERE event_id = {eventId})"
+
+for statement in [
+    f"""CREATE TABLE IF NOT EXISTS {EVENTS_FTS_IDS_TABLE} (
+        rowid INTEGER PRIMARY KEY, event_id UNIQUE NOT NULL)""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {EVENTS_FTS_TABLE} USING fts5(
+        name, tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO {EVENTS_FTS_IDS_TABLE}(event_id) VALUES (new.id);
+        INSERT INTO {EVENTS_FTS_TABLE}(rowid, name) VALUES ({_ftsRowid("new.id")}, new.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        DELETE FROM {EVENTS_FTS_TABLE} WHERE rowid = {_ftsRowid("old.id")};
+        DELETE FROM {EVENTS_FTS_IDS_TABLE} WHERE event_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF id, name ON events BEGIN
+        UPDATE {EVENTS_FTS_TABLE} SET name = new.name WHERE rowid = {_ftsRowid("old.id")};
+        UPDATE {EVENTS_FTS_IDS_TABLE} SET event_id = new.id WHERE event_id = old.id;
+    END""",
+]:
+    event.listen(EventModel.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+for statement in [
+    f"DROP TABLE IF EXISTS {EVENTS_FTS_TABLE}",
+    f"DROP TABLE IF EXISTS {EVENTS_FTS_IDS_TABLE}",
+]:
+    event.listen(EventModel.__table__, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
@@ -0,0 +1,21 @@
+import datetime
+from sqlalchemy.schema import Column
+from sqlalchemy import Uuid, DateTime, Boolean, ForeignKey
+
+from .baseDBModel import BaseModel
+from .uuid import uuid
+
+class EventExceptionModel(BaseModel):
+    __tablename__ = "eventexceptions"
+
+    id = Column(Uuid, primary_key=True, comment="primary key", default=uuid)
+    event_id = Column(
+        ForeignKey("events.id"), index=True,
+        comment="recurring event which owns this exception")
+
+    occurrence = Column(DateTime, comment="original start of the affected occurrence")
+    cancelled = Column(Boolean, default=False, comment="occurrence does not take place")
+    startdate = Column(DateTime, nullable=True, comment="new start of the occurrence (moved occurrence)")
+    enddate = Column(DateTime, nullable=True, comment="new end of the occurrence (moved occurrence)")
+
+    lastchange = Column(DateTime, default=datetime.datetime.now)
@@ -14,6 +14,15 @@ class Query:
     from .eventGQLModel import event_by_id
     event_by_id = event_by_id
 
+    from .eventGQLModel import event_search
+    event_search = event_search
+
+    from .eventGQLModel import event_conflicts
+    event_conflicts = event_conflicts
+
+    from .eventGQLModel import event_insert_conflicts
+    event_insert_conflicts = event_insert_conflicts
+
 @strawberry.type(description="""Type for mutation root""")
 class Mutation:
     from .eventGQLModel import event_insert
@@ -22,7 +31,13 @@ class Mutation:
     from .eventGQLModel import event_update
     event_update = event_update
 
+    from .eventGQLModel import event_exception_insert
+    event_exception_insert = event_exception_insert
+
+from utils.Profiling import ProfilingExtension
+
 schema = strawberry.federation.Schema(
     query=Query,
-    mutation=Mutation
+    mutation=Mutation,
+    extensions=[ProfilingExtension]
 )
\ No newline at end of file
@@ -1,9 +1,22 @@
 import uuid
+import enum
 import strawberry
 import datetime
 import typing
 
-from utils.Dataloaders import getLoadersFromInfo
+from utils.Dataloaders import getLoadersFromInfo, naiveDatetime
+from utils.Recurrence import expandOccurrences, isValidRule, isOccurrence
+
+@strawberry.enum(description="""Calendar bucket used for aggregation of events""")
+class EventHistogramBucket(enum.Enum):
+    DAY = "DAY"
+    WEEK = "WEEK"
+    MONTH = "MONTH"
+
+@strawberry.type(description="""Number of events starting in a calendar bucket""")
+class EventHistogramBinGQLModel:
+    start: datetime.datetime = strawberry.field(description="""Moment when the bucket starts""")
+    count: int = strawberry.field(description="""Number of events in the bucket""")
 
 @strawberry.federation.type(
     keys=["id"],
@@ -21,25 +34,35 @@ class EventGQLModel:
 
         return result
 
-    @strawberry.field(description="""Primary key""")
-    def id(self) -> uuid.UUID:
-        return self.id
-
-    @strawberry.field(description="""Name / label of the event""")
-    def name(self) -> str:
-        return self.name
-
-    @strawberry.field(description="""Moment when the event starts""")
-    def startdate(self) -> datetime.datetime:
-        return self.startdate
-
-    @strawberry.field(description="""Moment when the event ends""")
-    def enddate(self) -> datetime.datetime:
-        return self.enddate
-
-    @strawberry.field(description="""Timestamp / token""")
-    def lastchange(self) -> typing.Optional[datetime.datetime]:
-        return self.lastchange
+    # plain column fields have no resolver, strawberry reads them with getattr (no per-field Info nor coroutine)
+    id: uuid.UUID = strawberry.field(description="""Primary key""")
+    name: str = strawberry.field(description="""Name / label of the event""")
+    startdate: datetime.datetime = strawberry.field(description="""Moment when the event starts""")
+    enddate: datetime.datetime = strawberry.field(description="""Moment when the event ends""")
+    lastchange: typing.Optional[datetime.datetime] = strawberry.field(description="""Timestamp / token""")
+    rrule: typing.Optional[str] = strawberry.field(description="""Recurrence rule (RFC 5545 RRULE, e.g. FREQ=WEEKLY;COUNT=13), null for single event""")
+
+    @strawberry.field(description="""occurrences of the event overlapping the time window [start, end), ordered by startdate, at most limit (max 1000) occurrences""")
+    async def occurrences(
+        self, info: strawberry.types.Info,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        limit: int = 100
+    ) -> typing.List["EventOccurrenceGQLModel"]:
+        limit = max(0, min(limit, 1000))
+        exceptions = []
+        if self.rrule is not None:
+            loader = getLoadersFromInfo(info).eventexceptions
+            exceptions = await loader.filter_by(event_id=self.id)
+        occurrences = expandOccurrences(
+            self.startdate, self.enddate, self.rrule, exceptions,
+            start=naiveDatetime(start), end=naiveDatetime(end), limit=limit
+        )
+        result = [
+            EventOccurrenceGQLModel(event_id=self.id, occurrence=occurrence, startdate=startdate, enddate=enddate)
+            for occurrence, startdate, enddate in occurrences
+        ]
+        return result
 
     @strawberry.field(description="""event which contains this event (aka semester of this lesson)""")
     async def master_event(self, info: strawberry.types.Info) -> typing.Union["EventGQLModel", None]:
@@ -56,11 +79,81 @@ class EventGQLModel:
         result = await eventloader.filter_by(masterevent_id=self.id)
         return result
 
+    @strawberry.field(description="""number of events which are contained by this event""")
+    async def sub_event_count(self, info: strawberry.types.Info) -> int:
+        loader = getLoadersFromInfo(info).events_count_by_master
+        result = await loader.load(self.id)
+        return result
+
+    @strawberry.field(description="""numbers of events contained by this event, grouped by calendar bucket of their startdate (start inclusive, end exclusive)""")
+    async def sub_event_histogram(
+        self, info: strawberry.types.Info,
+        bucket: EventHistogramBucket = EventHistogramBucket.WEEK,
+        start: typing.Optional[datetime.datetime] = None,
+        end: typing.Optional[datetime.datetime] = None
+    ) -> typing.List[EventHistogramBinGQLModel]:
+        loader = getLoadersFromInfo(info).events_histogram_by_master
+        rows = await loader.load((self.id, bucket.value, naiveDatetime(start), naiveDatetime(end)))
+        result = [EventHistogramBinGQLModel(start=binstart, count=count) for binstart, count in rows]
+        return result
+
+@strawberry.type(description="""Single occurrence of (recurring) event""")
+class EventOccurrenceGQLModel:
+    event_id: uuid.UUID = strawberry.field(description="""ID of the event""")
+    occurrence: datetime.datetime = strawberry.field(description="""Original start of the occurrence, identifies the occurrence for exceptions""")
+    startdate: datetime.datetime = strawberry.field(description="""Moment when the occurrence starts""")
+    enddate: datetime.datetime = strawberry.field(description="""Moment when the occurrence ends""")
+
+    @strawberry.field(description="""the event""")
+    async def event(self, info: strawberry.types.Info) -> EventGQLModel:
+        return await EventGQLModel.resolve_reference(info, self.event_id)
+
 import uuid
 @strawberry.field(description="""returns and event""")
 async def event_by_id(info: strawberry.types.Info, id: uuid.UUID) -> typing.Optional[EventGQLModel]:
     return await EventGQLModel.resolve_reference(info, id)
 
+@strawberry.field(description="""returns events with name matching the text, best match first; every word of the text must match a prefix of a word in name, case and diacritics insensitive""")
+async def event_search(info: strawberry.types.Info, text: str, limit: int = 10) -> typing.List[EventGQLModel]:
+    limit = max(0, min(limit, 100))
+    searcher = getLoadersFromInfo(info).events_search
+    return await searcher.search(text, limit=limit)
+
+@strawberry.type(description="""pair of overlapping events""")
+class EventConflictGQLModel:
+    first_id: typing.Optional[uuid.UUID] = strawberry.field(description="""ID of the event which starts first""", default=None)
+    first_index: typing.Optional[int] = strawberry.field(description="""position of the first event in checked events, null for stored event""", default=None)
+    second_id: typing.Optional[uuid.UUID] = strawberry.field(description="""ID of the event which starts second""", default=None)
+    second_index: typing.Optional[int] = strawberry.field(description="""position of the second event in checked events, null for stored event""", default=None)
+
+    @strawberry.field(description="""the first event, null if it is not stored""")
+    async def first(self, info: strawberry.types.Info) -> typing.Optional[EventGQLModel]:
+        if self.first_index is not None:
+            return None
+        return await EventGQLModel.resolve_reference(info, self.first_id)
+
+    @strawberry.field(description="""the second event, null if it is not stored""")
+    async def second(self, info: strawberry.types.Info) -> typing.Optional[EventGQLModel]:
+        if self.second_index is not None:
+            return None
+        return await EventGQLModel.resolve_reference(info, self.second_id)
+
+    @classmethod
+    def from_pair(cls, pair):
+        (first_id, first_index), (second_id, second_index) = pair
+        return cls(first_id=first_id, first_index=first_index, second_id=second_id, second_index=second_index)
+
+@strawberry.field(description="""returns pairs of overlapping events contained by the master event, optionally within time window [start, end)""")
+async def event_conflicts(
+    info: strawberry.types.Info,
+    masterevent_id: uuid.UUID,
+    start: typing.Optional[datetime.datetime] = None,
+    end: typing.Optional[datetime.datetime] = None
+) -> typing.List[EventConflictGQLModel]:
+    finder = getLoadersFromInfo(info).events_conflicts
+    pairs = await finder.find(masterevent_id, start=start, end=end)
+    return [EventConflictGQLModel.from_pair(pair) for pair in pairs]
+
 ###################################################################
 #
 # Mutations
@@ -74,6 +167,7 @@ class EventInsertGQLModel:
     masterevent_id: typing.Optional[uuid.UUID] = strawberry.field(description="ID of master event", default=None)
     startdate: typing.Optional[datetime.datetime] = strawberry.field(description="moment when event starts", default_factory=lambda: datetime.datetime.now())
     enddate: typing.Optional[datetime.datetime] = strawberry.field(description="moment when event ends", default_factory=lambda: datetime.datetime.now() + datetime.timedelta(minutes = 30))
+    rrule: typing.Optional[str] = strawberry.field(description="recurrence rule (RFC 5545 RRULE), startdate and enddate define the first occurrence", default=None)
 
 @strawberry.input(description="definition of event used for update")
 class EventUpdateGQLModel:
@@ -83,7 +177,23 @@ class EventUpdateGQLModel:
     masterevent_id: typing.Optional[uuid.UUID] = strawberry.field(description="ID of master event", default=None)
     startdate: typing.Optional[datetime.datetime] = strawberry.field(description="moment when event starts", default=None)
     enddate: typing.Optional[datetime.datetime] = strawberry.field(description="moment when event ends", default=None)
+    rrule: typing.Optional[str] = strawberry.field(description="recurrence rule (RFC 5545 RRULE), empty string removes the rule", default=None)
+
+@strawberry.input(description="definition of exception of recurring event occurrence (cancelled or moved occurrence)")
+class EventExceptionInsertGQLModel:
+    event_id: uuid.UUID = strawberry.field(description="ID of recurring event")
+    occurrence: datetime.datetime = strawberry.field(description="original start of the occurrence")
+    cancelled: typing.Optional[bool] = strawberry.field(description="occurrence does not take place", default=False)
+    startdate: typing.Optional[datetime.datetime] = strawberry.field(description="new start of the occurrence", default=None)
+    enddate: typing.Optional[datetime.datetime] = strawberry.field(description="new end of the occurrence", default=None)
+    id: typing.Optional[uuid.UUID] = strawberry.field(description="primary key (UUID), could be client generated", default=None)
+
 
+@strawberry.field(description="""dry run of insert, returns pairs of overlapping events (checked events with stored events of the same master event and with each other), events without master event are not checked""")
+async def event_insert_conflicts(info: strawberry.types.Info, events: typing.List[EventInsertGQLModel]) -> typing.List[EventConflictGQLModel]:
+    finder = getLoadersFromInfo(info).events_conflicts
+    pairs = await finder.check(events)
+    return [EventConflictGQLModel.from_pair(pair) for pair in pairs]
 
 @strawberry.type(description="result of CUD operation on event")
 class EventResultGQLModel:
@@ -96,6 +206,8 @@ class EventResultGQLModel:
 
 @strawberry.mutation(description="write new event into database")
 async def event_insert(self, info: strawberry.types.Info, event: EventInsertGQLModel) -> EventResultGQLModel:
+    if (event.rrule is not None) and not isValidRule(event.rrule, event.startdate):
+        return EventResultGQLModel(id=event.id, msg="fail")
     loader = getLoadersFromInfo(info).events
     row = await loader.insert(event)
     result = EventResultGQLModel()
@@ -105,8 +217,13 @@ async def event_insert(self, info: strawberry.types.Info, event: EventInsertGQLM
 
 @strawberry.mutation(description="update the event in database")
 async def event_update(self, info: strawberry.types.Info, event: EventUpdateGQLModel) -> EventResultGQLModel:
+    extraValues = {}
+    if event.rrule == "":
+        extraValues["rrule"] = None
+    elif (event.rrule is not None) and not isValidRule(event.rrule, event.startdate or datetime.datetime.now()):
+        return EventResultGQLModel(id=event.id, msg="fail")
     loader = getLoadersFromInfo(info).events
-    row = await loader.update(event)
+    row = await loader.update(event, extraValues=extraValues)
     result = EventResultGQLModel()
     result.id = event.id
     if row is None:
@@ -114,3 +231,24 @@ async def event_update(self, info: strawberry.types.Info, event: EventUpdateGQLM
     else:    
         result.msg = "ok"
     return result
+
+@strawberry.mutation(description="cancel or move single occurrence of recurring event")
+async def event_exception_insert(self, info: strawberry.types.Info, exception: EventExceptionInsertGQLModel) -> EventResultGQLModel:
+    result = EventResultGQLModel()
+    result.id = exception.event_id
+    result.msg = "fail"
+
+    exception.occurrence = naiveDatetime(exception.occurrence)
+    exception.startdate = naiveDatetime(exception.startdate)
+    exception.enddate = naiveDatetime(exception.enddate)
+
+    loaders = getLoadersFromInfo(info)
+    event = await loaders.events.load(exception.event_id)
+    if (event is None) or (event.rrule is None) or (event.startdate is None):
+        return result
+    if not isOccurrence(event.rrule, event.startdate, exception.occurrence):
+        return result
+
+    await loaders.eventexceptions.insert(exception)
+    result.msg = "ok"
+    return result
@@ -0,0 +1,38 @@
+"""Measures conflict detection (utils.Conflicts.findOverlaps) on timetable-like data.
+
+run from the repository root:
+
+`python -m benchmarks.bench_conflicts [lessons]`
+"""
+import sys
+import time
+import random
+import datetime
+
+from utils.Conflicts import findOverlaps
+
+
+def timetable(lessons, seed=42):
+    """weekly lessons of 90 minutes in 7 slots per day, 5 days per week, rooms are not distinguished"""
+    rnd = random.Random(seed)
+    base = datetime.datetime(2023, 9, 4, 8, 0)
+    result = []
+    for key in range(lessons):
+        day = rnd.randint(0, 7 * 15 - 1)
+        slot = rnd.randint(0, 6)
+        start = base + datetime.timedelta(days=day, minutes=slot * 100 + rnd.choice([0, 0, 0, 30]))
+        result.append((key, start, start + datetime.timedelta(minutes=90)))
+    return result
+
+
+def main(lessons):
+    intervals = timetable(lessons)
+    start = time.perf_counter()
+    overlaps = findOverlaps(intervals)
+    elapsed = time.perf_counter() - start
+    print(f"{lessons} lessons, {len(overlaps)} overlapping pairs, {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    lessons = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    main(lessons)
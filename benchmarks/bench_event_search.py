@@ -0,0 +1,75 @@
+"""Measures event_search (text index) against naive LIKE scan over EventModel.name.
+
+run from the repository root:
+
+`python -m benchmarks.bench_event_search [rows]`
+
+rows defaults to 1 000 000, data are stored in temporary sqlite file (FTS5 index).
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+import sqlalchemy
+from sqlalchemy import select
+
+from DBDefinitions import startEngine, EventModel
+from utils.Dataloaders import createEventSearcher
+from DBDefinitions.uuid import uuid
+
+SUBJECTS = ["Matematika", "Fyzika", "Chemie", "Programování", "Databáze", "Sítě", "Elektrotechnika", "Angličtina", "Taktika", "Logistika"]
+KINDS = ["přednáška", "cvičení", "laboratoř", "seminář", "zkouška"]
+
+
+async def fill(asyncSessionMaker, rows, chunk=20_000):
+    rnd = random.Random(42)
+    async with asyncSessionMaker() as session:
+        for offset in range(0, rows, chunk):
+            values = [
+                {
+                    "id": uuid(),
+                    "name": f"{rnd.choice(SUBJECTS)} {rnd.choice(KINDS)} {rnd.randint(1, 99)}/{rnd.randint(1, 40)}"
+                }
+                for _ in range(min(chunk, rows - offset))
+            ]
+            await session.execute(sqlalchemy.insert(EventModel), values)
+        await session.commit()
+
+
+async def measure(name, fn, repeat=20):
+    result = await fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{name:40} {elapsed * 1000:10.2f} ms ({len(result)} rows)")
+
+
+async def main(rows):
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "events.sqlite")
+        asyncSessionMaker = await startEngine(f"sqlite+aiosqlite:///{filename}", makeDrop=True, makeUp=True)
+
+        start = time.perf_counter()
+        await fill(asyncSessionMaker, rows)
+        print(f"inserted {rows} rows in {time.perf_counter() - start:.1f} s")
+
+        searcher = createEventSearcher(asyncSessionMaker)
+
+        async def scan(text, limit=10):
+            async with asyncSessionMaker() as session:
+                statement = select(EventModel).where(EventModel.name.icontains(text)).limit(limit)
+                result = await session.execute(statement)
+                return list(result.scalars())
+
+        for text in ["Databáze cvič", "Logistika zkouška 17", "Neexistuje"]:
+            await measure(f"search '{text}'", lambda: searcher.search(text, limit=10))
+            await measure(f"LIKE scan '{text}'", lambda: scan(text, limit=10))
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    asyncio.run(main(rows))
@@ -0,0 +1,41 @@
+"""Compares reflective utils.Dataloaders.update with compiled utils.Dataloaders.createMapper.
+
+run from the repository root:
+
+`python -m benchmarks.bench_mappers`
+"""
+import uuid
+import timeit
+import datetime
+
+from DBDefinitions import EventModel
+from GraphTypeDefinitions.eventGQLModel import EventInsertGQLModel
+from utils.Dataloaders import update, createMapper
+
+
+def main(number=100_000):
+    entity = EventInsertGQLModel(
+        name="lesson",
+        id=uuid.uuid4(),
+        masterevent_id=uuid.uuid4(),
+        startdate=datetime.datetime(2023, 9, 1, 8, 0),
+        enddate=datetime.datetime(2023, 9, 1, 9, 30)
+    )
+    mapper = createMapper(EventInsertGQLModel, EventModel)
+
+    def reflective():
+        return update(EventModel(), entity)
+
+    def compiled():
+        return mapper(entity)
+
+    def compiled_with_model():
+        return EventModel(**mapper(entity))
+
+    for name, fn in [("update (reflective)", reflective), ("mapper", compiled), ("mapper + EventModel(**values)", compiled_with_model)]:
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        print(f"{name:32} {best / number * 1e6:8.2f} us per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compares standard (json) and fast (orjson, see utils.Serialization) response serialization.
+
+run from the repository root:
+
+`python -m benchmarks.bench_serialization [events]`
+
+events (default 10 000) are sub events of single master event, all of them are returned in one response.
+CPU time is the best of several runs, peak memory is measured by tracemalloc in separate run.
+"""
+import sys
+import json
+import time
+import asyncio
+import datetime
+import tracemalloc
+
+import sqlalchemy
+
+from DBDefinitions import startEngine, EventModel
+from DBDefinitions.uuid import uuid
+from GraphTypeDefinitions import schema
+from utils.Dataloaders import createLoadersContext
+from utils.Serialization import encodeJSON
+
+QUERY = """
+    query($id: UUID!) {
+        result: eventById(id: $id) {
+            id
+            subEvents { id name startdate enddate lastchange }
+        }
+    }"""
+
+
+def encodeStandard(data):
+    return json.dumps(data, separators=(",", ":"))
+
+
+async def fill(asyncSessionMaker, events):
+    masterId = uuid()
+    start = datetime.datetime(2023, 9, 4, 8, 0)
+    async with asyncSessionMaker() as session:
+        await session.execute(sqlalchemy.insert(EventModel), [{"id": masterId, "name": "semester", "startdate": start, "enddate": start}])
+        await session.execute(sqlalchemy.insert(EventModel), [
+            {
+                "id": uuid(), "name": f"lesson {index}", "masterevent_id": masterId,
+                "startdate": start + datetime.timedelta(hours=index),
+                "enddate": start + datetime.timedelta(hours=index, minutes=90)
+            }
+            for index in range(events)
+        ])
+        await session.commit()
+    return masterId
+
+
+async def respond(asyncSessionMaker, encode, masterId):
+    context_value = createLoadersContext(asyncSessionMaker)
+    resp = await schema.execute(QUERY, variable_values={"id": f"{masterId}"}, context_value=context_value)
+    assert resp.errors is None
+    return encode({"data": resp.data})
+
+
+async def main(events):
+    asyncSessionMaker = await startEngine("sqlite+aiosqlite:///:memory:", makeDrop=True, makeUp=True)
+    masterId = await fill(asyncSessionMaker, events)
+
+    modes = [("standard", encodeStandard), ("fast", encodeJSON)]
+    bodies = {}
+    for name, encode in modes:
+        times = []
+        for _ in range(5):
+            start = time.process_time()
+            bodies[name] = await respond(asyncSessionMaker, encode, masterId)
+            times.append(time.process_time() - start)
+
+        tracemalloc.start()
+        await respond(asyncSessionMaker, encode, masterId)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:10} cpu {min(times) * 1000:8.1f} ms   peak {peak / 2**20:6.1f} MiB   body {len(bodies[name])} B")
+
+    assert json.loads(bodies["standard"]) == json.loads(bodies["fast"])
+
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    asyncio.run(main(events))
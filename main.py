@@ -1,21 +1,27 @@
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from strawberry.fastapi import GraphQLRouter
 
 from GraphTypeDefinitions import schema
+from utils.Admission import ComposeAdmissionController, AdmissionMiddleware
+from utils.Profiling import ComposeProfilingGate
 
 appcontext = {}
+admissionController = ComposeAdmissionController()
+profilingGate = ComposeProfilingGate()
 @asynccontextmanager
 async def initEngine(app: FastAPI):
 
-    from DBDefinitions import startEngine, ComposeConnectionString
+    from DBDefinitions import startEngine, ComposeConnectionString, ComposeEngineArgs
 
     connectionstring = ComposeConnectionString()
 
     asyncSessionMaker = await startEngine(
         connectionstring=connectionstring,
         makeDrop=True,
-        makeUp=True
+        makeUp=True,
+        **ComposeEngineArgs()
     )
 
     appcontext["asyncSessionMaker"] = asyncSessionMaker
@@ -37,14 +43,32 @@ print("All initialization is done ")
 def hello():
    return {'hello': 'world'}
 
+@app.get('/metrics')
+def metrics():
+   return {'admission': admissionController.getMetrics()}
+
+app.add_middleware(AdmissionMiddleware, controller=admissionController, pathPrefix="/gql")
+
 
 def get_context():
     from utils.Dataloaders import createLoadersContext
-    return createLoadersContext(appcontext["asyncSessionMaker"])
-
-graphql_app = GraphQLRouter(
-    schema,
-    context_getter=get_context
-)
+    asyncSessionMaker = admissionController.limitSessionMaker(appcontext["asyncSessionMaker"])
+    return {
+        **createLoadersContext(asyncSessionMaker),
+        "profilingGate": profilingGate
+    }
+
+# GQL_SERIALIZATION=fast: responses are encoded by orjson, standard: strawberry defaults
+if os.environ.get("GQL_SERIALIZATION", "fast") == "fast":
+    from utils.Serialization import FastGraphQLRouter
+    graphql_app = FastGraphQLRouter(
+        schema,
+        context_getter=get_context
+    )
+else:
+    graphql_app = GraphQLRouter(
+        schema,
+        context_getter=get_context
+    )
 
 app.include_router(graphql_app, prefix="/gql")
\ No newline at end of file
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from utils.Admission import AdmissionController, OverloadedError, QueueTimeoutError
+
+from .shared import prepare_demodata, prepare_in_memory_sqllite, createContext
+from GraphTypeDefinitions import schema
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_over_queue():
+    controller = AdmissionController(maxInFlight=1, maxQueued=1, requestTimeout=5)
+    release = asyncio.Event()
+
+    async def request():
+        async with controller.admit():
+            await release.wait()
+
+    first = asyncio.create_task(request())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(request())
+    await asyncio.sleep(0)
+
+    with pytest.raises(OverloadedError):
+        async with controller.admit():
+            pass
+
+    release.set()
+    await asyncio.gather(first, second)
+
+    metrics = controller.getMetrics()
+    assert metrics["admitted"] == 2
+    assert metrics["queued"] == 1
+    assert metrics["rejected"] == 1
+    assert metrics["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_timeout():
+    controller = AdmissionController(maxInFlight=1, maxQueued=1, requestTimeout=0.01)
+    with pytest.raises(TimeoutError):
+        async with controller.admit():
+            await asyncio.sleep(1)
+
+    assert controller.getMetrics()["timedout"] == 1
+    # slot is released after timeout
+    async with controller.admit():
+        pass
+
+
+@pytest.mark.asyncio
+async def test_limited_session_maker():
+    async_session_maker = await prepare_in_memory_sqllite()
+    await prepare_demodata(async_session_maker)
+
+    controller = AdmissionController(maxDBConcurrent=1)
+    limited_session_maker = controller.limitSessionMaker(async_session_maker)
+    context_value = await createContext(limited_session_maker)
+    query = """
+        query($id: UUID!) {
+            result: eventById(id: $id) {
+                id
+                subEvents { id masterEvent { id } }
+            }
+        }"""
+    variables = {"id": "5194663f-11aa-4775-91ed-5f3d79269fed"}
+    resp = await schema.execute(query, variable_values=variables, context_value=context_value)
+
+    assert resp.errors is None
+    assert len(resp.data["result"]["subEvents"]) == 2
+    assert controller.getMetrics()["dbwaits"] > 0
+
+
+@pytest.mark.asyncio
+async def test_admission_queue_timeout():
+    controller = AdmissionController(maxInFlight=1, maxQueued=1, requestTimeout=5, queueTimeout=0.01)
+    release = asyncio.Event()
+
+    async def request():
+        async with controller.admit():
+            await release.wait()
+
+    first = asyncio.create_task(request())
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueTimeoutError):
+        async with controller.admit():
+            pass
+
+    release.set()
+    await first
+
+    metrics = controller.getMetrics()
+    assert metrics["queuetimedout"] == 1
+    assert metrics["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_app_deadline_cancels_request():
+    import time
+    import httpx
+    from contextlib import asynccontextmanager
+    import main
+
+    async_session_maker = await prepare_in_memory_sqllite()
+    await prepare_demodata(async_session_maker)
+
+    cancelled = asyncio.Event()
+
+    @asynccontextmanager
+    async def slow_session_maker():
+        try:
+            await asyncio.sleep(2)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        async with async_session_maker() as session:
+            yield session
+
+    requestTimeout = main.admissionController.requestTimeout
+    main.admissionController.requestTimeout = 0.2
+    main.appcontext["asyncSessionMaker"] = slow_session_maker
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.monotonic()
+            resp = await client.post("/gql", json={"query": '{ eventById(id: "5194663f-11aa-4775-91ed-5f3d79269fed") { id } }'})
+            elapsed = time.monotonic() - start
+    finally:
+        main.admissionController.requestTimeout = requestTimeout
+        del main.appcontext["asyncSessionMaker"]
+
+    assert resp.status_code == 504
+    assert elapsed < 1
+    assert cancelled.is_set()
+    assert main.admissionController.getMetrics()["inflight"] == 0
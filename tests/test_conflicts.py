@@ -0,0 +1,40 @@
+import random
+import datetime
+
+from utils.Conflicts import findOverlaps
+
+
+def bruteForce(intervals):
+    result = set()
+    intervals = [interval for interval in intervals if interval[1] < interval[2]]
+    for keyA, startA, endA in intervals:
+        for keyB, startB, endB in intervals:
+            if keyA < keyB and startA < endB and startB < endA:
+                result.add((keyA, keyB))
+    return result
+
+
+def test_find_overlaps_matches_brute_force():
+    rnd = random.Random(1)
+    base = datetime.datetime(2023, 9, 1)
+    intervals = []
+    for key in range(300):
+        start = base + datetime.timedelta(minutes=15 * rnd.randint(0, 500))
+        end = start + datetime.timedelta(minutes=15 * rnd.randint(0, 8))
+        intervals.append((key, start, end))
+
+    overlaps = findOverlaps(intervals)
+    assert {tuple(sorted(pair)) for pair in overlaps} == bruteForce(intervals)
+    assert len(overlaps) == len(set(overlaps))
+
+
+def test_find_overlaps_half_open():
+    base = datetime.datetime(2023, 9, 1)
+    hour = datetime.timedelta(hours=1)
+    intervals = [
+        ("a", base, base + hour),
+        ("b", base + hour, base + 2 * hour),
+        ("c", base + hour / 2, base + hour / 2 * 3),
+        ("d", None, base),
+    ]
+    assert sorted(findOverlaps(intervals)) == [("a", "c"), ("c", "b")]
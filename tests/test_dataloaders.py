@@ -0,0 +1,69 @@
+import uuid
+import datetime
+
+from DBDefinitions import EventModel
+from GraphTypeDefinitions.eventGQLModel import EventInsertGQLModel, EventUpdateGQLModel
+from utils.Dataloaders import createMapper
+
+
+def test_mapper_is_compiled_once():
+    assert createMapper(EventInsertGQLModel, EventModel) is createMapper(EventInsertGQLModel, EventModel)
+    assert createMapper(EventInsertGQLModel, EventModel) is not createMapper(EventUpdateGQLModel, EventModel)
+
+
+def test_mapper_values():
+    id = uuid.uuid4()
+    lastchange = datetime.datetime(2023, 10, 29, 11, 0, 0)
+    entity = EventUpdateGQLModel(id=id, lastchange=lastchange, name="new name")
+    mapper = createMapper(EventUpdateGQLModel, EventModel)
+
+    values = mapper(entity)
+    assert values == {"id": id, "lastchange": lastchange, "name": "new name"}
+
+    masterevent_id = uuid.uuid4()
+    values = mapper(entity, {"masterevent_id": masterevent_id})
+    assert values["masterevent_id"] == masterevent_id
+
+
+import pytest
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+from utils.Dataloaders import createEventSearcher, composeEventSearchStatement
+from .shared import prepare_demodata, prepare_in_memory_sqllite
+
+
+def test_postgres_search_statement():
+    statement = composeEventSearchStatement("postgresql", ["Databáze", "cvič"], 10)
+    sql = f"{statement.compile(dialect=postgresql.dialect())}"
+    assert sql.count("events_unaccent(events.name) ~ concat(") == 2
+    assert "word_similarity" in sql
+
+
+@pytest.mark.asyncio
+async def test_search_index_survives_vacuum():
+    async_session_maker = await prepare_in_memory_sqllite()
+    await prepare_demodata(async_session_maker)
+    searcher = createEventSearcher(async_session_maker)
+
+    async with async_session_maker() as session:
+        engine = session.bind
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.exec_driver_sql("VACUUM")
+
+    rows = await searcher.search("zkous")
+    assert [row.name for row in rows] == ["Zkouška"]
+    eventId = rows[0].id
+
+    async with async_session_maker() as session:
+        await session.execute(sqlalchemy.update(EventModel).where(EventModel.id == eventId).values(name="Zápočet"))
+        await session.commit()
+    assert await searcher.search("zkous") == []
+    assert [row.id for row in await searcher.search("zapoc")] == [eventId]
+
+    async with async_session_maker() as session:
+        await session.execute(sqlalchemy.delete(EventModel).where(EventModel.id == eventId))
+        await session.commit()
+    assert await searcher.search("zapoc") == []
+    assert len(await searcher.search("2022")) == 3
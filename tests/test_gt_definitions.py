@@ -319,3 +319,277 @@ test_query_event_failed_update = createFrontendQuery(
     ]
 )
 
+
+test_query_event_subevent_aggregates = createFrontendQuery(
+    query="""
+        query($id: UUID!) {
+            result: eventById(id: $id) {
+                id
+                subEventCount
+                subEventHistogram(bucket: MONTH) {
+                    start
+                    count
+                }
+                subEvents {
+                    id
+                    subEventCount
+                }
+            }
+        }""",
+    variables={
+        "id": "5194663f-11aa-4775-91ed-5f3d79269fed"
+    },
+    asserts = [
+        lambda data: runAssert(data.get("result", None) is not None, "expected data.result"),
+        lambda data: runAssert(data["result"]["subEventCount"] == 2, "expected data.result.subEventCount == 2"),
+        lambda data: runAssert(
+            data["result"]["subEventHistogram"] == [
+                {"start": "2022-09-01T00:00:00", "count": 1},
+                {"start": "2023-03-01T00:00:00", "count": 1}
+            ], "expected monthly data.result.subEventHistogram"),
+        lambda data: runAssert(
+            all(sub["subEventCount"] == 0 for sub in data["result"]["subEvents"]),
+            "expected zero data.result.subEvents.subEventCount")
+    ]
+)
+
+test_query_event_subevent_histogram_window = createFrontendQuery(
+    query="""
+        query($id: UUID!, $start: DateTime!, $end: DateTime!) {
+            result: eventById(id: $id) {
+                id
+                subEventHistogram(bucket: WEEK, start: $start, end: $end) {
+                    start
+                    count
+                }
+            }
+        }""",
+    variables={
+        "id": "5194663f-11aa-4775-91ed-5f3d79269fed",
+        "start": "2023-01-01T00:00:00",
+        "end": "2024-01-01T00:00:00"
+    },
+    asserts = [
+        lambda data: runAssert(data.get("result", None) is not None, "expected data.result"),
+        lambda data: runAssert(
+            data["result"]["subEventHistogram"] == [
+                {"start": "2023-02-27T00:00:00", "count": 1}
+            ], "expected weekly data.result.subEventHistogram")
+    ]
+)
+
+test_query_event_subevent_histogram_aware_window = createFrontendQuery(
+    query="""
+        query($id: UUID!, $start: DateTime!, $end: DateTime!) {
+            result: eventById(id: $id) {
+                id
+                subEventHistogram(bucket: WEEK, start: $start, end: $end) {
+                    start
+                    count
+                }
+            }
+        }""",
+    variables={
+        "id": "5194663f-11aa-4775-91ed-5f3d79269fed",
+        "start": "2023-01-01T00:00:00Z",
+        "end": "2024-01-01T00:00:00Z"
+    },
+    asserts = [
+        lambda data: runAssert(data.get("result", None) is not None, "expected data.result"),
+        lambda data: runAssert(
+            data["result"]["subEventHistogram"] == [
+                {"start": "2023-02-27T00:00:00", "count": 1}
+            ], "expected weekly data.result.subEventHistogram")
+    ]
+)
+
+test_query_event_search = createFrontendQuery(
+    query="""
+        query($text: String!) {
+            result: eventSearch(text: $text) {
+                id
+                name
+            }
+        }""",
+    variables={
+        "text": "2022/2"
+    },
+    asserts = [
+        lambda data: runAssert(len(data["result"]) == 3, "expected 3 events in data.result"),
+        lambda data: runAssert(data["result"][0]["name"] == "2022/23", "expected best match first"),
+    ]
+)
+
+test_query_event_search_diacritics = createFrontendQuery(
+    query="""
+        query($text: String!) {
+            result: eventSearch(text: $text, limit: 5) {
+                id
+                name
+            }
+        }""",
+    variables={
+        "text": "zkous"
+    },
+    asserts = [
+        lambda data: runAssert([row["name"] for row in data["result"]] == ["Zkouška"], "expected Zkouška"),
+    ]
+)
+
+test_query_event_conflicts = createFrontendQuery(
+    query="""
+        query($id: UUID!) {
+            result: eventConflicts(mastereventId: $id) {
+                firstId
+                secondId
+            }
+        }""",
+    variables={
+        "id": "5194663f-11aa-4775-91ed-5f3d79269fed"
+    },
+    asserts = [
+        lambda data: runAssert(data["result"] == [], "expected no conflicts (semesters only touch)"),
+    ]
+)
+
+test_query_event_insert_conflicts = createFrontendQuery(
+    query="""
+        query($id: UUID!) {
+            result: eventInsertConflicts(events: [
+                {name: "lesson A", mastereventId: $id, startdate: "2023-02-28T10:00:00", enddate: "2023-03-01T10:00:00"},
+                {name: "lesson B", mastereventId: $id, startdate: "2023-02-28T11:00:00Z", enddate: "2023-02-28T12:00:00Z"},
+                {name: "top level", startdate: "2023-02-28T11:00:00", enddate: "2023-02-28T12:00:00"}
+            ]) {
+                firstId
+                firstIndex
+                first { id }
+                secondId
+                secondIndex
+                second { id }
+            }
+        }""",
+    variables={
+        "id": "5194663f-11aa-4775-91ed-5f3d79269fed"
+    },
+    asserts = [
+        lambda data: runAssert(len(data["result"]) == 4, "expected 4 conflicts"),
+        lambda data: runAssert(
+            {(row["firstId"], row["firstIndex"], row["secondId"], row["secondIndex"]) for row in data["result"]} == {
+                ("08ff1c5d-9891-41f6-a824-fc6272adc189", None, None, 0),
+                ("08ff1c5d-9891-41f6-a824-fc6272adc189", None, None, 1),
+                (None, 0, None, 1),
+                (None, 0, "0945ad17-3a36-4d33-b849-ad88144415ba", None),
+            }, "expected conflicts with both semesters and between lessons"),
+        lambda data: runAssert(
+            all((row["first"] is None) == (row["firstIndex"] is not None) for row in data["result"]),
+            "expected stored events resolved"),
+    ]
+)
+
+@pytest.mark.asyncio
+async def test_event_occurrences():
+    async_session_maker = await prepare_in_memory_sqllite()
+    await prepare_demodata(async_session_maker)
+    context_value = await createContext(async_session_maker)
+
+    eventId = "f3c6a4a0-5e0b-4d3c-9d6f-0a1b2c3d4e5f"
+    query = """
+        mutation($id: UUID!) {
+            result: eventInsert(event: {
+                id: $id, name: "lesson",
+                startdate: "2023-09-04T08:00:00", enddate: "2023-09-04T09:30:00",
+                rrule: "FREQ=WEEKLY;COUNT=13"
+            }) { msg }
+            cancelled: eventExceptionInsert(exception: {
+                eventId: $id, occurrence: "2023-09-11T08:00:00", cancelled: true
+            }) { msg }
+            moved: eventExceptionInsert(exception: {
+                eventId: $id, occurrence: "2023-09-18T08:00:00",
+                startdate: "2023-09-19T10:00:00", enddate: "2023-09-19T11:30:00"
+            }) { msg }
+        }"""
+    resp = await schema.execute(query, variable_values={"id": eventId}, context_value=context_value)
+    assert resp.errors is None
+    assert resp.data["result"]["msg"] == "ok"
+
+    query = """
+        query($id: UUID!) {
+            result: eventById(id: $id) {
+                rrule
+                occurrences(start: "2023-09-01T00:00:00", end: "2023-10-01T00:00:00") {
+                    occurrence
+                    startdate
+                    enddate
+                }
+                limited: occurrences(start: "2023-09-01T00:00:00", end: "2024-09-01T00:00:00", limit: 2) {
+                    startdate
+                }
+            }
+        }"""
+    resp = await schema.execute(query, variable_values={"id": eventId}, context_value=context_value)
+    assert resp.errors is None
+    result = resp.data["result"]
+    assert result["rrule"] == "FREQ=WEEKLY;COUNT=13"
+    assert [row["startdate"] for row in result["occurrences"]] == [
+        "2023-09-04T08:00:00",
+        "2023-09-19T10:00:00",
+        "2023-09-25T08:00:00",
+    ]
+    assert result["occurrences"][1]["occurrence"] == "2023-09-18T08:00:00"
+    assert result["occurrences"][2]["enddate"] == "2023-09-25T09:30:00"
+    assert len(result["limited"]) == 2
+
+    # timezone aware window is accepted
+    query = """
+        query($id: UUID!) {
+            result: eventById(id: $id) {
+                lastchange
+                occurrences(start: "2023-09-01T00:00:00Z", end: "2023-10-01T00:00:00+02:00") { startdate }
+            }
+        }"""
+    resp = await schema.execute(query, variable_values={"id": eventId}, context_value=context_value)
+    assert resp.errors is None
+    assert len(resp.data["result"]["occurrences"]) == 3
+    lastchange = resp.data["result"]["lastchange"]
+
+    # exceptions of missing event, of not recurring event and of not existing occurrence are refused
+    query = """
+        mutation($id: UUID!) {
+            missing: eventExceptionInsert(exception: {
+                eventId: "bbedf480-3e1d-435c-b994-eeeeeeeeeeee", occurrence: "2023-09-11T08:00:00", cancelled: true
+            }) { msg }
+            single: eventExceptionInsert(exception: {
+                eventId: "5194663f-11aa-4775-91ed-5f3d79269fed", occurrence: "2022-09-01T00:00:00", cancelled: true
+            }) { msg }
+            wrong: eventExceptionInsert(exception: {
+                eventId: $id, occurrence: "2023-09-12T08:00:00", cancelled: true
+            }) { msg }
+        }"""
+    resp = await schema.execute(query, variable_values={"id": eventId}, context_value=context_value)
+    assert resp.errors is None
+    assert [resp.data[key]["msg"] for key in ["missing", "single", "wrong"]] == ["fail", "fail", "fail"]
+
+    # empty rule removes recurrence
+    query = """
+        mutation($id: UUID!, $lastchange: DateTime!) {
+            result: eventUpdate(event: {id: $id, lastchange: $lastchange, rrule: ""}) {
+                msg
+                event { rrule }
+            }
+        }"""
+    resp = await schema.execute(query, variable_values={"id": eventId, "lastchange": lastchange}, context_value=context_value)
+    assert resp.errors is None
+    assert resp.data["result"]["msg"] == "ok"
+    assert resp.data["result"]["event"]["rrule"] is None
+
+test_query_event_invalid_rrule = createFrontendQuery(
+    query="""
+        mutation {
+            result: eventInsert(event: {name: "lesson", rrule: "FREQ=SOMETIMES"}) {
+                msg
+            }
+        }""",
+    asserts = [
+        lambda data: runAssert(data["result"]["msg"] == "fail", "expected fail"),
+    ]
+)
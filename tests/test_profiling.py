@@ -0,0 +1,73 @@
+import pytest
+
+from GraphTypeDefinitions import schema
+from utils.Profiling import ProfilingGate, safeOperationName
+
+from .shared import prepare_demodata, prepare_in_memory_sqllite, createContext
+
+
+class FakeRequest:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+async def executeProfiled(gate, headers, operationName=None):
+    async_session_maker = await prepare_in_memory_sqllite()
+    await prepare_demodata(async_session_maker)
+    context_value = await createContext(async_session_maker)
+    context_value["profilingGate"] = gate
+    context_value["request"] = FakeRequest(headers)
+    query = """
+        query %s($id: UUID!) {
+            result: eventById(id: $id) {
+                id
+                subEvents { id }
+            }
+        }""" % (operationName or "")
+    variables = {"id": "5194663f-11aa-4775-91ed-5f3d79269fed"}
+    resp = await schema.execute(query, variable_values=variables, context_value=context_value, operation_name=operationName)
+    assert resp.errors is None
+    return resp
+
+
+@pytest.mark.asyncio
+async def test_profile_inline():
+    gate = ProfilingGate(adminToken="secret", minInterval=60)
+    headers = {"x-profile": "secret", "x-profile-inline": "true"}
+    resp = await executeProfiled(gate, headers)
+    assert "profile" in resp.extensions
+    assert "speedscope" in resp.extensions["profile"]["$schema"]
+
+    # second request within minInterval is not profiled
+    resp = await executeProfiled(gate, headers)
+    assert "profile" not in (resp.extensions or {})
+
+
+@pytest.mark.asyncio
+async def test_profile_to_directory(tmp_path):
+    gate = ProfilingGate(sampleRate=1.0, minInterval=0, outputDir=f"{tmp_path}")
+    resp = await executeProfiled(gate, {})
+    assert "profile" not in (resp.extensions or {})
+    assert len(list(tmp_path.glob("*.speedscope.json"))) == 1
+
+    # operation name from client is sanitized before it is used in filename
+    await executeProfiled(gate, {}, operationName="__TraversalAttempt")
+    files = sorted(path.name for path in tmp_path.glob("*.speedscope.json"))
+    assert len(files) == 2
+    assert any(name.endswith("-__TraversalAttempt.speedscope.json") for name in files)
+
+
+def test_operation_name_is_sanitized():
+    assert safeOperationName("../../etc/passwd") == "______etc_passwd"
+    assert safeOperationName(None) == "anonymous"
+    assert len(safeOperationName("a" * 1000)) == 64
+
+
+@pytest.mark.asyncio
+async def test_profile_disabled():
+    gate = ProfilingGate(adminToken="secret")
+    resp = await executeProfiled(gate, {"x-profile": "wrong", "x-profile-inline": "true"})
+    assert "profile" not in (resp.extensions or {})
+    resp = await executeProfiled(gate, {"x-profile": "sécret", "x-profile-inline": "true"})
+    assert "profile" not in (resp.extensions or {})
+    assert not gate.running
@@ -0,0 +1,103 @@
+import datetime
+import time
+import types
+
+from utils.Recurrence import expandOccurrences, isValidRule, isOccurrence
+
+start = datetime.datetime(2023, 9, 4, 8, 0)
+end = datetime.datetime(2023, 9, 4, 9, 30)
+
+
+def test_far_window_jumps_to_window():
+    occurrences = expandOccurrences(
+        start, end, "FREQ=DAILY", [],
+        start=datetime.datetime(2024, 1, 1), end=datetime.datetime(2030, 1, 1), limit=5
+    )
+    occurrences = list(occurrences)
+    assert len(occurrences) == 5
+    assert occurrences[0][1] == datetime.datetime(2024, 1, 1, 8, 0)
+
+    # 1.5 days long occurrences, the one started the day before overlaps the window
+    occurrences = expandOccurrences(
+        start, start + datetime.timedelta(hours=36), "FREQ=DAILY;INTERVAL=2", [],
+        start=datetime.datetime(2025, 1, 7), end=datetime.datetime(2025, 1, 9)
+    )
+    assert [startdate for _, startdate, _ in occurrences] == [
+        datetime.datetime(2025, 1, 6, 8, 0),
+        datetime.datetime(2025, 1, 8, 8, 0),
+    ]
+
+    occurrences = expandOccurrences(
+        start, end, "FREQ=WEEKLY;COUNT=3", [],
+        start=datetime.datetime(2025, 1, 6), end=datetime.datetime(2025, 1, 7)
+    )
+    assert list(occurrences) == []
+
+    occurrences = expandOccurrences(
+        start, end, "FREQ=WEEKLY;COUNT=20", [],
+        start=datetime.datetime(2024, 1, 15), end=datetime.datetime(2024, 3, 1)
+    )
+    # 20th occurrence is on 2024-01-15, the last one
+    assert [startdate for _, startdate, _ in occurrences] == [datetime.datetime(2024, 1, 15, 8, 0)]
+
+
+def test_far_window_is_fast():
+    began = time.monotonic()
+    occurrences = list(expandOccurrences(
+        start, end, "FREQ=DAILY", [],
+        start=datetime.datetime(2900, 1, 1), end=datetime.datetime(2900, 1, 3)
+    ))
+    assert [startdate for _, startdate, _ in occurrences] == [
+        datetime.datetime(2900, 1, 1, 8, 0),
+        datetime.datetime(2900, 1, 2, 8, 0),
+    ]
+    assert isOccurrence("FREQ=WEEKLY", start, datetime.datetime(2900, 1, 4, 8, 0))
+    assert not isOccurrence("FREQ=WEEKLY", start, datetime.datetime(2900, 1, 5, 8, 0))
+
+    # rules with BY* parts are expanded from startdate, at most MAX_SCAN instances
+    occurrences = list(expandOccurrences(
+        start, end, "FREQ=WEEKLY;BYDAY=MO,WE", [],
+        start=datetime.datetime(2900, 1, 1), end=datetime.datetime(2900, 1, 3)
+    ))
+    assert occurrences == []
+    assert not isOccurrence("FREQ=WEEKLY;BYDAY=MO,WE", start, datetime.datetime(2900, 1, 4, 8, 0))
+    assert time.monotonic() - began < 0.5
+
+
+def test_window_overlap_and_single_event():
+    occurrences = list(expandOccurrences(
+        start, end, None, [],
+        start=datetime.datetime(2023, 9, 4, 9, 0), end=datetime.datetime(2023, 9, 5)
+    ))
+    assert occurrences == [(start, start, end)]
+
+    occurrences = list(expandOccurrences(
+        start, end, None, [],
+        start=datetime.datetime(2023, 9, 4, 9, 30), end=datetime.datetime(2023, 9, 5)
+    ))
+    assert occurrences == []
+
+
+def test_moved_into_window():
+    exception = types.SimpleNamespace(
+        occurrence=datetime.datetime(2023, 9, 11, 8, 0), cancelled=False,
+        startdate=datetime.datetime(2023, 10, 2, 8, 0), enddate=None
+    )
+    occurrences = list(expandOccurrences(
+        start, end, "FREQ=WEEKLY;COUNT=3", [exception],
+        start=datetime.datetime(2023, 9, 15), end=datetime.datetime(2023, 10, 15)
+    ))
+    assert [startdate for _, startdate, _ in occurrences] == [
+        datetime.datetime(2023, 9, 18, 8, 0),
+        datetime.datetime(2023, 10, 2, 8, 0),
+    ]
+    assert occurrences[1][2] == datetime.datetime(2023, 10, 2, 9, 30)
+
+
+def test_is_valid_rule():
+    assert isValidRule("FREQ=WEEKLY;BYDAY=MO,WE;COUNT=26", start)
+    assert not isValidRule("FREQ=SOMETIMES", start)
+    assert not isValidRule("FREQ=HOURLY", start)
+    assert not isValidRule("FREQ=MINUTELY;COUNT=10", start)
+    assert not isValidRule("RRULE:FREQ=SECONDLY", start)
+    assert not isValidRule("COUNT=10", start)
@@ -0,0 +1,84 @@
+import json
+import uuid
+import datetime
+
+import httpx
+import pytest
+from graphql import get_introspection_query
+
+from GraphTypeDefinitions import schema
+from utils.Serialization import FastGraphQLRouter, encodeJSON, encodeDefault
+
+from .shared import prepare_demodata, prepare_in_memory_sqllite, createContext
+
+
+async def postToApp(query, variables={}):
+    import main
+    assert isinstance(main.graphql_app, FastGraphQLRouter)
+
+    async_session_maker = await prepare_in_memory_sqllite()
+    await prepare_demodata(async_session_maker)
+    main.appcontext["asyncSessionMaker"] = async_session_maker
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            resp = await client.post("/gql", json={"query": query, "variables": variables})
+    finally:
+        del main.appcontext["asyncSessionMaker"]
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_fast_router_encodes_same_json():
+    query = """
+        query($id: UUID!) {
+            result: eventById(id: $id) {
+                id
+                name
+                startdate
+                enddate
+                lastchange
+                subEvents { id name startdate enddate masterEvent { id } }
+            }
+        }"""
+    variables = {"id": "5194663f-11aa-4775-91ed-5f3d79269fed"}
+    body = await postToApp(query, variables)
+    assert "errors" not in body
+
+    async_session_maker = await prepare_in_memory_sqllite()
+    await prepare_demodata(async_session_maker)
+    context_value = await createContext(async_session_maker)
+    resp = await schema.execute(query, variable_values=variables, context_value=context_value)
+    assert resp.errors is None
+
+    respdata = json.loads(json.dumps(resp.data))
+    # lastchange is set during import, it differs between databases
+    for data in [body["data"], respdata]:
+        data["result"].pop("lastchange")
+    assert body["data"] == respdata
+
+
+@pytest.mark.asyncio
+async def test_fast_router_sdl_and_introspection():
+    assert "input EventInsertGQLModel" in schema.as_str()
+
+    body = await postToApp("{ _service { sdl } }")
+    assert "errors" not in body
+    assert "startdate: DateTime" in body["data"]["_service"]["sdl"]
+
+    body = await postToApp(get_introspection_query())
+    assert "errors" not in body
+    types = {item["name"]: item for item in body["data"]["__schema"]["types"]}
+    inputFields = {item["name"]: item for item in types["EventInsertGQLModel"]["inputFields"]}
+    assert inputFields["startdate"]["defaultValue"] is not None
+
+
+def test_encode_default():
+    value = {
+        "id": uuid.UUID("5194663f-11aa-4775-91ed-5f3d79269fed"),
+        "startdate": datetime.datetime(2023, 9, 4, 8, 0, 0, 123456),
+    }
+    encoded = json.dumps(value, default=encodeDefault)
+    assert json.loads(encoded) == {"id": f"{value['id']}", "startdate": value["startdate"].isoformat()}
+    assert json.loads(encodeJSON(value)) == json.loads(encoded)
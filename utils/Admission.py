@@ -0,0 +1,138 @@
+import os
+import asyncio
+import collections
+from contextlib import asynccontextmanager
+
+from starlette.responses import JSONResponse
+
+
+class OverloadedError(Exception):
+    """Raised when request cannot be admitted because the queue is full"""
+    pass
+
+
+class QueueTimeoutError(OverloadedError):
+    """Raised when request waits in the queue longer than queueTimeout"""
+    pass
+
+
+class AdmissionController:
+    """Limits number of requests in flight.
+    Requests over maxInFlight wait in queue of size maxQueued, requests over the queue are rejected immediately.
+    Request waiting in the queue longer than queueTimeout seconds is rejected too.
+    Each admitted request must finish within requestTimeout seconds, otherwise it is cancelled (TimeoutError is raised).
+    Each request could use at most maxDBConcurrent database sessions at once (see limitSessionMaker).
+    All decisions are counted in metrics.
+    """
+    def __init__(self, maxInFlight=64, maxQueued=128, requestTimeout=30.0, maxDBConcurrent=4, queueTimeout=5.0):
+        self.maxInFlight = maxInFlight
+        self.maxQueued = maxQueued
+        self.requestTimeout = requestTimeout
+        self.queueTimeout = queueTimeout
+        self.maxDBConcurrent = maxDBConcurrent
+        self.semaphore = asyncio.Semaphore(maxInFlight)
+        self.inFlight = 0
+        self.queued = 0
+        self.metrics = collections.Counter()
+
+    @asynccontextmanager
+    async def admit(self):
+        if self.semaphore.locked():
+            if self.queued >= self.maxQueued:
+                self.metrics["rejected"] += 1
+                raise OverloadedError(f"more than {self.maxQueued} requests are waiting")
+            self.metrics["queued"] += 1
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), self.queueTimeout)
+            except TimeoutError:
+                self.metrics["queuetimedout"] += 1
+                raise QueueTimeoutError(f"request waited in the queue more than {self.queueTimeout} s")
+            finally:
+                self.queued -= 1
+        else:
+            await self.semaphore.acquire()
+
+        self.metrics["admitted"] += 1
+        self.inFlight += 1
+        try:
+            async with asyncio.timeout(self.requestTimeout):
+                yield
+        except TimeoutError:
+            self.metrics["timedout"] += 1
+            raise
+        finally:
+            self.inFlight -= 1
+            self.semaphore.release()
+
+    def limitSessionMaker(self, asyncSessionMaker):
+        """Returns session maker which allows at most maxDBConcurrent opened sessions at once.
+        Should be created for each request, so it limits the request, not the whole app."""
+        semaphore = asyncio.Semaphore(self.maxDBConcurrent)
+        metrics = self.metrics
+
+        @asynccontextmanager
+        async def limitedSessionMaker():
+            if semaphore.locked():
+                metrics["dbwaits"] += 1
+            async with semaphore:
+                async with asyncSessionMaker() as session:
+                    yield session
+
+        return limitedSessionMaker
+
+    def getMetrics(self):
+        return {
+            **self.metrics,
+            "inflight": self.inFlight,
+            "waiting": self.queued
+        }
+
+
+def ComposeAdmissionController():
+    """Creates AdmissionController from environment variables."""
+    maxInFlight = int(os.environ.get("GQL_MAX_INFLIGHT", "64"))
+    maxQueued = int(os.environ.get("GQL_MAX_QUEUED", "128"))
+    requestTimeout = float(os.environ.get("GQL_REQUEST_TIMEOUT", "30"))
+    maxDBConcurrent = int(os.environ.get("GQL_MAX_DB_CONCURRENCY", "4"))
+    queueTimeout = float(os.environ.get("GQL_QUEUE_TIMEOUT", "5"))
+    return AdmissionController(
+        maxInFlight=maxInFlight,
+        maxQueued=maxQueued,
+        requestTimeout=requestTimeout,
+        maxDBConcurrent=maxDBConcurrent,
+        queueTimeout=queueTimeout
+    )
+
+
+class AdmissionMiddleware:
+    """ASGI middleware which admits requests with path starting with pathPrefix through AdmissionController.
+    The app runs in the same task as the middleware, so expired deadline cancels the app (and its pending queries).
+    Rejected requests get 503, requests over the deadline get 504 (if the response has not been started yet)."""
+    def __init__(self, app, controller, pathPrefix="/gql"):
+        self.app = app
+        self.controller = controller
+        self.pathPrefix = pathPrefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.pathPrefix):
+            return await self.app(scope, receive, send)
+
+        responseStarted = False
+        async def trackedSend(message):
+            nonlocal responseStarted
+            if message["type"] == "http.response.start":
+                responseStarted = True
+            await send(message)
+
+        try:
+            async with self.controller.admit():
+                await self.app(scope, receive, trackedSend)
+        except OverloadedError as e:
+            response = JSONResponse(status_code=503, content={"errors": [{"message": f"{e}"}]}, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+        except TimeoutError:
+            if responseStarted:
+                raise
+            response = JSONResponse(status_code=504, content={"errors": [{"message": "request timed out"}]})
+            await response(scope, receive, send)
@@ -0,0 +1,24 @@
+import heapq
+
+
+def findOverlaps(intervals):
+    """Finds all pairs of overlapping intervals.
+    intervals is iterable of tuples (key, start, end), intervals are half-open [start, end),
+    so event ending at the moment when other starts does not overlap with it.
+    Intervals without start or end and empty intervals are ignored.
+    Returns list of pairs (key, key), the first one starts earlier.
+    Intervals are sorted by start and swept with heap of active ends, O(n log n + number of overlaps).
+    """
+    ordered = sorted(
+        (interval for interval in intervals if interval[1] is not None and interval[2] is not None and interval[1] < interval[2]),
+        key=lambda interval: (interval[1], interval[2])
+    )
+    active = []
+    result = []
+    for order, (key, start, end) in enumerate(ordered):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, _, activeKey in active:
+            result.append((activeKey, key))
+        heapq.heappush(active, (end, order, key))
+    return result
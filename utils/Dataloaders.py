@@ -1,8 +1,15 @@
+import re
 import datetime
-from sqlalchemy import select
+import dataclasses
+import operator
+import sqlalchemy
+from sqlalchemy import select, func
 from functools import cache
+from strawberry.dataloader import DataLoader
 
-from DBDefinitions.eventDBModel import EventModel
+from DBDefinitions.eventDBModel import EventModel, EVENTS_FTS_TABLE, EVENTS_FTS_IDS_TABLE, EVENTS_UNACCENT_FUNCTION
+from DBDefinitions.eventExceptionDBModel import EventExceptionModel
+from utils.Conflicts import findOverlaps
 
 def update(destination, source=None, extraValues={}):
     """Updates destination's attributes with source's attributes.
@@ -21,6 +28,48 @@ def update(destination, source=None, extraValues={}):
     return destination
 
 
+def naiveDatetime(value):
+    """Database columns hold naive datetimes, timezone is dropped the same way as in DBFeeder"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.replace(tzinfo=None)
+
+
+@cache
+def createMapper(InputType, DBModel):
+    """Compiles (once per pair InputType, DBModel) function mapper(entity, extraValues={}) -> dict.
+    Only attributes which are fields of InputType (strawberry input is a dataclass) and columns of DBModel are mapped,
+    values None are skipped, extraValues are added as they are.
+    Resulting dict (column key -> value) could be used in sqlalchemy insert(DBModel).values(...) or update(DBModel).values(...).
+    """
+    columns = {attr.key: attr.columns[0].key for attr in sqlalchemy.inspect(DBModel).column_attrs}
+    if dataclasses.is_dataclass(InputType):
+        names = [field.name for field in dataclasses.fields(InputType) if field.name in columns]
+    else:
+        names = [name for name in columns.keys() if hasattr(InputType, name)]
+    columnKeys = tuple(columns[name] for name in names)
+
+    if len(names) == 0:
+        getValues = lambda entity: ()
+    elif len(names) == 1:
+        getter = operator.attrgetter(names[0])
+        getValues = lambda entity: (getter(entity),)
+    else:
+        getValues = operator.attrgetter(*names)
+
+    def mapper(entity, extraValues={}):
+        values = {
+            key: value
+            for key, value in zip(columnKeys, getValues(entity))
+            if value is not None
+        }
+        if extraValues:
+            values.update((columns.get(name, name), value) for name, value in extraValues.items())
+        return values
+
+    return mapper
+
+
 def createLoader(asyncSessionMaker, DBModel):
     baseStatement = select(DBModel)
     class Loader:
@@ -40,40 +89,214 @@ def createLoader(asyncSessionMaker, DBModel):
                 return rows
 
         async def insert(self, entity, extra={}):
-            newdbrow = DBModel()
-            newdbrow = update(newdbrow, entity, extra)
+            mapper = createMapper(type(entity), DBModel)
+            values = mapper(entity, extra)
+            statement = sqlalchemy.insert(DBModel).values(**values).returning(DBModel)
             async with asyncSessionMaker() as session:
-                session.add(newdbrow)
+                rows = await session.execute(statement)
+                newdbrow = rows.scalar_one()
                 await session.commit()
             return newdbrow
             
         async def update(self, entity, extraValues={}):
+            mapper = createMapper(type(entity), DBModel)
+            values = mapper(entity, extraValues)
+            statement = sqlalchemy.update(DBModel).where(DBModel.id == entity.id)
+
+            dochecks = hasattr(DBModel, 'lastchange')
+            if (dochecks):
+                statement = statement.where(DBModel.lastchange == entity.lastchange)
+                values["lastchange"] = datetime.datetime.now()
+
+            statement = statement.values(**values).returning(DBModel)
             async with asyncSessionMaker() as session:
-                statement = baseStatement.filter_by(id=entity.id)
                 rows = await session.execute(statement)
-                rows = rows.scalars()
-                rowToUpdate = next(rows, None)
-
-                if rowToUpdate is None:
-                    return None
-
-                dochecks = hasattr(rowToUpdate, 'lastchange')             
-                checkpassed = True  
-                if (dochecks):
-                    if (entity.lastchange != rowToUpdate.lastchange):
-                        result = None
-                        checkpassed = False                        
-                    else:
-                        entity.lastchange = datetime.datetime.now()
-                if checkpassed:
-                    rowToUpdate = update(rowToUpdate, entity, extraValues=extraValues)
-                    await session.commit()
-                    result = rowToUpdate               
+                result = rows.scalar_one_or_none()
+                await session.commit()
             return result
 
 
     return Loader()
 
+def createCountLoader(asyncSessionMaker, DBModel, groupByName):
+    """Returns DataLoader which counts rows of DBModel grouped by groupByName column.
+    Keys are values of groupByName column, all keys from one request are counted with single GROUP BY."""
+    groupByColumn = getattr(DBModel, groupByName)
+    baseStatement = (
+        select(groupByColumn, func.count())
+        .group_by(groupByColumn)
+    )
+    async def batch_load(keys):
+        statement = baseStatement.where(groupByColumn.in_(keys))
+        async with asyncSessionMaker() as session:
+            rows = await session.execute(statement)
+            counts = {key: count for key, count in rows}
+        return [counts.get(key, 0) for key in keys]
+
+    return DataLoader(load_fn=batch_load)
+
+
+HISTOGRAM_BUCKETS = ["DAY", "WEEK", "MONTH"]
+
+def bucketExpression(dialectName, bucket, column):
+    """Returns SQL expression which truncates column (datetime) to the start of the bucket.
+    Weeks start on monday."""
+    assert bucket in HISTOGRAM_BUCKETS, f"unknown bucket {bucket}"
+    if dialectName == "sqlite":
+        if bucket == "DAY":
+            return func.date(column)
+        if bucket == "WEEK":
+            return func.date(column, "weekday 0", "-6 days")
+        return func.strftime("%Y-%m-01", column)
+    return func.date_trunc(bucket.lower(), column)
+
+def asDatetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    return datetime.datetime.fromisoformat(value)
+
+def createHistogramLoader(asyncSessionMaker, DBModel, groupByName, dateName):
+    """Returns DataLoader which counts rows of DBModel grouped by groupByName column and calendar bucket of dateName column.
+    Keys are tuples (groupByValue, bucket, start, end), start and end could be None.
+    Keys sharing (bucket, start, end) are resolved with single GROUP BY query.
+    Each key is resolved as list of (bucketstart, count) ordered by bucketstart."""
+    groupByColumn = getattr(DBModel, groupByName)
+    dateColumn = getattr(DBModel, dateName)
+
+    async def batch_load(keys):
+        groups = {}
+        for groupByValue, bucket, start, end in keys:
+            groups.setdefault((bucket, start, end), set()).add(groupByValue)
+
+        results = {}
+        async with asyncSessionMaker() as session:
+            dialectName = session.bind.dialect.name
+            for (bucket, start, end), groupByValues in groups.items():
+                bucketColumn = bucketExpression(dialectName, bucket, dateColumn).label("bucket")
+                statement = (
+                    select(groupByColumn, bucketColumn, func.count())
+                    .where(groupByColumn.in_(groupByValues))
+                    .group_by(groupByColumn, bucketColumn)
+                    .order_by(groupByColumn, bucketColumn)
+                )
+                if start is not None:
+                    statement = statement.where(dateColumn >= start)
+                if end is not None:
+                    statement = statement.where(dateColumn < end)
+                rows = await session.execute(statement)
+                for groupByValue, bucketStart, count in rows:
+                    if bucketStart is None:
+                        continue
+                    results.setdefault((groupByValue, bucket, start, end), []).append((asDatetime(bucketStart), count))
+        return [results.get(key, []) for key in keys]
+
+    return DataLoader(load_fn=batch_load)
+
+
+EVENT_SEARCH_SQLITE_STATEMENT = sqlalchemy.text(
+    f"SELECT events.* FROM {EVENTS_FTS_TABLE} "
+    f"JOIN {EVENTS_FTS_IDS_TABLE} ON {EVENTS_FTS_IDS_TABLE}.rowid = {EVENTS_FTS_TABLE}.rowid "
+    f"JOIN events ON events.id = {EVENTS_FTS_IDS_TABLE}.event_id "
+    f"WHERE {EVENTS_FTS_TABLE} MATCH :query ORDER BY {EVENTS_FTS_TABLE}.rank LIMIT :limit"
+)
+
+def composeEventSearchStatement(dialectName, words, limit):
+    """Returns statement which finds events with name matching all words (as prefixes of words in name)."""
+    if dialectName == "sqlite":
+        query = " ".join(f'"{word}"*' for word in words)
+        return select(EventModel).from_statement(EVENT_SEARCH_SQLITE_STATEMENT.bindparams(query=query, limit=limit))
+
+    unaccent = getattr(func, EVENTS_UNACCENT_FUNCTION)
+    name = unaccent(EventModel.name)
+    # \m is start of word in postgres regular expressions, words contain only \w characters
+    wordConditions = [
+        name.op("~")(func.concat("\\m", unaccent(word)))
+        for word in words
+    ]
+    rank = func.word_similarity(unaccent(" ".join(words)), name)
+    return (
+        select(EventModel)
+        .where(*wordConditions)
+        .order_by(rank.desc(), func.length(EventModel.name), EventModel.name)
+        .limit(limit)
+    )
+
+
+def createEventSearcher(asyncSessionMaker):
+    """Returns object with method search(text, limit) which finds events by name using text index (see eventDBModel).
+    Every word of text is matched as prefix of a word in name (all words must match), case and diacritics insensitive.
+    Results are ordered by rank (best first)."""
+    class Searcher:
+        async def search(self, text, limit=10):
+            words = re.findall(r"\w+", text)
+            if len(words) == 0:
+                return []
+            async with asyncSessionMaker() as session:
+                statement = composeEventSearchStatement(session.bind.dialect.name, words, limit)
+                rows = await session.execute(statement)
+                return list(rows.scalars())
+
+    return Searcher()
+
+
+def createConflictFinder(asyncSessionMaker, DBModel):
+    """Returns object which finds overlapping rows of DBModel (startdate, enddate) sharing the same masterevent_id.
+    Only primary keys and dates are read from database, sorted by startdate.
+    Conflicts are reported as tuples (first, second), where each item is tuple (id, index),
+    index is position in checked candidates or None for rows stored in database."""
+
+    async def readIntervals(session, masterevent_id, start, end, excludedIds=()):
+        statement = (
+            select(DBModel.id, DBModel.startdate, DBModel.enddate)
+            .where(DBModel.masterevent_id == masterevent_id)
+            .order_by(DBModel.startdate)
+        )
+        if start is not None:
+            statement = statement.where(DBModel.enddate > start)
+        if end is not None:
+            statement = statement.where(DBModel.startdate < end)
+        rows = await session.execute(statement)
+        return [((id, None), startdate, enddate) for id, startdate, enddate in rows if id not in excludedIds]
+
+    class ConflictFinder:
+        async def find(self, masterevent_id, start=None, end=None):
+            """returns conflicts among stored rows within time window [start, end)"""
+            async with asyncSessionMaker() as session:
+                intervals = await readIntervals(session, masterevent_id, naiveDatetime(start), naiveDatetime(end))
+            return findOverlaps(intervals)
+
+        async def check(self, candidates):
+            """returns conflicts of candidates (not stored yet) with stored rows and with each other (dry run of insert)
+            candidates without masterevent_id are skipped (top level events are not checked)"""
+            groups = {}
+            for index, candidate in enumerate(candidates):
+                if candidate.masterevent_id is None:
+                    continue
+                groups.setdefault(candidate.masterevent_id, []).append(
+                    ((candidate.id, index), naiveDatetime(candidate.startdate), naiveDatetime(candidate.enddate))
+                )
+
+            result = []
+            async with asyncSessionMaker() as session:
+                for masterevent_id, intervals in groups.items():
+                    starts = [start for _, start, _ in intervals if start is not None]
+                    ends = [end for _, _, end in intervals if end is not None]
+                    if len(starts) == 0 or len(ends) == 0:
+                        continue
+                    excludedIds = {id for (id, _), _, _ in intervals if id is not None}
+                    stored = await readIntervals(session, masterevent_id, min(starts), max(ends), excludedIds)
+                    overlaps = findOverlaps(stored + intervals)
+                    result.extend(
+                        (first, second) for first, second in overlaps
+                        if first[1] is not None or second[1] is not None
+                    )
+            return result
+
+    return ConflictFinder()
+
+
 def createLoaders(asyncSessionMaker):
     class Loaders:
         @property
@@ -81,6 +304,31 @@ def createLoaders(asyncSessionMaker):
         def events(self):
             return createLoader(asyncSessionMaker, EventModel)
 
+        @property
+        @cache
+        def eventexceptions(self):
+            return createLoader(asyncSessionMaker, EventExceptionModel)
+
+        @property
+        @cache
+        def events_search(self):
+            return createEventSearcher(asyncSessionMaker)
+
+        @property
+        @cache
+        def events_conflicts(self):
+            return createConflictFinder(asyncSessionMaker, EventModel)
+
+        @property
+        @cache
+        def events_count_by_master(self):
+            return createCountLoader(asyncSessionMaker, EventModel, "masterevent_id")
+
+        @property
+        @cache
+        def events_histogram_by_master(self):
+            return createHistogramLoader(asyncSessionMaker, EventModel, "masterevent_id", "startdate")
+
     return Loaders()
 
 
@@ -0,0 +1,124 @@
+import os
+import re
+import hmac
+import json
+import asyncio
+import time
+import random
+import datetime
+
+from strawberry.extensions import SchemaExtension
+
+
+class ProfilingGate:
+    """Decides which requests are profiled.
+    Request is profiled when it carries header X-Profile with adminToken or when it is sampled with sampleRate.
+    At most one request is profiled at once and profiling is triggered at most once per minInterval seconds.
+    With header X-Profile-Inline: true the profile is returned in extensions of the response,
+    otherwise it is written into outputDir.
+    """
+    def __init__(self, adminToken=None, sampleRate=0.0, minInterval=60.0, outputDir="./profiles", interval=0.001):
+        self.adminToken = adminToken
+        self.sampleRate = sampleRate
+        self.minInterval = minInterval
+        self.outputDir = outputDir
+        self.interval = interval
+        self.lastStarted = None
+        self.running = False
+
+    def decide(self, headers):
+        """Returns profiling options or None if request should not be profiled.
+        When options are returned, release must be called after profiling."""
+        token = headers.get("x-profile", None)
+        byAdmin = (self.adminToken is not None) and hmac.compare_digest((token or "").encode(), self.adminToken.encode())
+        if not byAdmin:
+            if self.sampleRate <= 0 or random.random() >= self.sampleRate:
+                return None
+
+        if self.running:
+            return None
+        now = time.monotonic()
+        if (self.lastStarted is not None) and (now - self.lastStarted < self.minInterval):
+            return None
+
+        inline = byAdmin and headers.get("x-profile-inline", "").lower() == "true"
+        self.lastStarted = now
+        self.running = True
+        return {"inline": inline}
+
+    def release(self):
+        self.running = False
+
+
+def safeOperationName(operationName):
+    """Operation name is controlled by client, only [A-Za-z0-9_] characters could be used in filename"""
+    return re.sub(r"[^A-Za-z0-9_]", "_", operationName or "anonymous")[:64]
+
+
+def writeProfile(outputDir, filename, profile):
+    os.makedirs(outputDir, exist_ok=True)
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(profile)
+
+
+class ProfilingExtension(SchemaExtension):
+    """Profiles the operation with pyinstrument (sampling profiler) when ProfilingGate from context (key "profilingGate") allows it.
+    Result is in speedscope format (https://www.speedscope.app), which renders flamegraphs."""
+
+    profile = None
+
+    async def on_operation(self):
+        context = self.execution_context.context
+        context = context if isinstance(context, dict) else {}
+        gate = context.get("profilingGate", None)
+        request = context.get("request", None)
+        options = None
+        if (gate is not None) and (request is not None):
+            options = gate.decide(request.headers)
+        if options is None:
+            yield
+            return
+
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            gate.release()
+            yield
+            return
+
+        profiler = Profiler(interval=gate.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            gate.release()
+
+        from pyinstrument.renderers import SpeedscopeRenderer
+        profile = profiler.output(renderer=SpeedscopeRenderer())
+        if options["inline"]:
+            self.profile = json.loads(profile)
+        else:
+            operationName = safeOperationName(self.execution_context.operation_name)
+            timestamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+            filename = os.path.join(gate.outputDir, f"{timestamp}-{operationName}.speedscope.json")
+            await asyncio.to_thread(writeProfile, gate.outputDir, filename, profile)
+
+    def get_results(self):
+        if self.profile is None:
+            return {}
+        return {"profile": self.profile}
+
+
+def ComposeProfilingGate():
+    """Creates ProfilingGate from environment variables. Without GQL_PROFILE_TOKEN and GQL_PROFILE_SAMPLE_RATE profiling is disabled."""
+    adminToken = os.environ.get("GQL_PROFILE_TOKEN", None) or None
+    sampleRate = float(os.environ.get("GQL_PROFILE_SAMPLE_RATE", "0"))
+    minInterval = float(os.environ.get("GQL_PROFILE_MIN_INTERVAL", "60"))
+    outputDir = os.environ.get("GQL_PROFILE_DIR", "./profiles")
+    return ProfilingGate(
+        adminToken=adminToken,
+        sampleRate=sampleRate,
+        minInterval=minInterval,
+        outputDir=outputDir
+    )
@@ -0,0 +1,117 @@
+import re
+import heapq
+import datetime
+import itertools
+
+from dateutil.rrule import rrule, rrulestr
+
+# at most MAX_SCAN instances of the rule are generated for single expansion, counted from startdate
+# (or from the instance where expansion jumped to, see jumpToTarget)
+MAX_SCAN = 10000
+SUPPORTED_FREQS = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+JUMP_PERIODS = {"DAILY": datetime.timedelta(days=1), "WEEKLY": datetime.timedelta(weeks=1)}
+
+
+def parseRule(rule, startdate):
+    """Parses recurrence rule (RFC 5545 RRULE, e.g. FREQ=WEEKLY;BYDAY=MO,WE;COUNT=26) starting at startdate.
+    Raises ValueError for invalid rule."""
+    return rrulestr(rule, dtstart=startdate, cache=False)
+
+
+def ruleParts(rule):
+    """Returns dict of parts of single line rule (FREQ=WEEKLY;COUNT=26 -> {"FREQ": "WEEKLY", "COUNT": "26"}), None for other rules"""
+    text = rule.strip().upper()
+    if text.startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+    if "\n" in text:
+        return None
+    return dict(part.partition("=")[::2] for part in text.split(";") if part)
+
+
+def isValidRule(rule, startdate):
+    """Sub-daily rules (FREQ=HOURLY, MINUTELY, SECONDLY) are not valid, they produce too many occurrences."""
+    freqs = re.findall(r"FREQ=([A-Z]+)", rule.upper())
+    if not freqs or any(freq not in SUPPORTED_FREQS for freq in freqs):
+        return False
+    try:
+        parseRule(rule, startdate)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def jumpToTarget(rule, startdate, target):
+    """Returns instances of the rule starting at startdate, at most MAX_SCAN of them.
+    Instances of DAILY and WEEKLY rules without BY* parts are equidistant, so they start
+    at the last instance before target (computed arithmetically), other rules start at startdate.
+    """
+    parsed = parseRule(rule, startdate)
+    parts = ruleParts(rule)
+    period = JUMP_PERIODS.get(parts.get("FREQ", None), None) if parts is not None else None
+    if (
+        (period is None) or (target <= startdate) or not isinstance(parsed, rrule)
+        or any(name.startswith("BY") for name in parts)
+    ):
+        return itertools.islice(parsed, MAX_SCAN)
+
+    period = period * int(parts.get("INTERVAL", "1"))
+    skipped = (target - startdate) // period
+    jumped = {"dtstart": startdate + skipped * period}
+    if "COUNT" in parts:
+        jumped["count"] = int(parts["COUNT"]) - skipped
+        if jumped["count"] <= 0:
+            return iter(())
+    return itertools.islice(parsed.replace(**jumped), MAX_SCAN)
+
+
+def isOccurrence(rule, startdate, occurrence):
+    """Checks if occurrence is start of an occurrence of the rule."""
+    for instance in jumpToTarget(rule, startdate, occurrence):
+        if instance >= occurrence:
+            return instance == occurrence
+    return False
+
+
+def expandOccurrences(startdate, enddate, rule, exceptions, start, end, limit=100):
+    """Generates occurrences (occurrence, startdate, enddate) of event overlapping window [start, end), ordered by startdate.
+    occurrence is the original start, it identifies the occurrence for exceptions.
+    Event without rule has single occurrence.
+    exceptions is iterable of objects with attributes occurrence, cancelled, startdate, enddate,
+    cancelled occurrences are skipped, moved occurrences use their new dates.
+    Expansion stops at the end of window or after limit occurrences.
+    The rule is expanded from the window for DAILY and WEEKLY rules without BY* parts, other rules are expanded
+    from startdate and only their first MAX_SCAN instances are considered, so the work is bounded for any window.
+    """
+    if startdate is None:
+        return
+    duration = (enddate - startdate) if enddate is not None else datetime.timedelta(0)
+    exceptions = {exception.occurrence: exception for exception in exceptions}
+
+    def originals():
+        if rule is None:
+            occurrences = [startdate]
+        else:
+            occurrences = jumpToTarget(rule, startdate, start - duration)
+        for occurrence in occurrences:
+            if occurrence >= end:
+                break
+            # occurrence overlaps the window when it ends after start (or starts at start for zero duration)
+            if not (occurrence + duration > start or occurrence >= start):
+                continue
+            exception = exceptions.get(occurrence, None)
+            if (exception is not None) and (exception.cancelled or exception.startdate is not None):
+                continue
+            yield (occurrence, occurrence, occurrence + duration)
+
+    moved = [
+        (exception.occurrence, exception.startdate, exception.enddate or (exception.startdate + duration))
+        for exception in exceptions.values()
+        if not exception.cancelled and exception.startdate is not None
+    ]
+    moved = sorted(
+        (item for item in moved if item[1] < end and (item[1] >= start or item[2] > start)),
+        key=lambda item: item[1]
+    )
+
+    merged = heapq.merge(originals(), moved, key=lambda item: item[1])
+    yield from itertools.islice(merged, limit)
@@ -0,0 +1,33 @@
+import json
+import uuid
+import datetime
+
+from strawberry.fastapi import GraphQLRouter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encodeDefault(value):
+    if isinstance(value, uuid.UUID):
+        return f"{value}"
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encodeJSON(data):
+    """Encodes data with orjson (natively handles uuid.UUID and datetime), falls back to json with encodeDefault."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), default=encodeDefault)
+
+
+class FastGraphQLRouter(GraphQLRouter):
+    """GraphQLRouter which encodes responses with encodeJSON.
+    Scalars of the schema are not changed (schema printing and introspection need their standard serialization),
+    so only encoding of the response is faster."""
+    def encode_json(self, data):
+        return encodeJSON(data)